@@ -1,9 +1,31 @@
 # analysis.py with multi-educator support
 import pandas as pd
+import csv
+import hashlib
 import json
+import os
 from datetime import datetime
 import unicodedata
 import re
+import heapq
+from concurrent.futures import ProcessPoolExecutor
+from xlsx_reader import read_peps_xlsx
+from display import activity_tag, build_display
+from matcher import DEFAULT_THRESHOLD, EducatorMatcher
+
+
+RULES_FILE = "rules.json"
+
+# Default rules, used when rules.json is missing.
+# - keywords: matched on normalized text (no accents, lowercase)
+# - columns: list of column indexes to look at, or null for every column
+# - action: "skip" (ignore the row) or "cancel" (activity is cancelled)
+DEFAULT_RULES = [
+    {"name": "appel", "keywords": ["appel"], "columns": [1], "action": "skip"},
+    {"name": "annulation", "keywords": ["annul"], "columns": None, "action": "cancel"},
+]
+
+RULE_ACTIONS = ("skip", "cancel")
 
 
 def normalize_name(text):
@@ -19,26 +41,77 @@ def normalize_name(text):
     return text
 
 
-def is_activity_cancelled(activity_text, desc_general, residents_text):
-    """Check if activity is cancelled by looking for 'annul' variations in all fields"""
-    # Normalize all texts
-    activity_norm = normalize_name(activity_text)
-    desc_norm = normalize_name(desc_general)
-    residents_norm = normalize_name(residents_text)
+def load_employees():
+    with open("employees.json", "r", encoding="utf-8") as f:
+        return json.load(f)
 
-    # Check for "annul" (catches annulé, annule, annulée, etc.)
-    cancelled_pattern = r"annul"
 
-    return (
-        bool(re.search(cancelled_pattern, activity_norm))
-        or bool(re.search(cancelled_pattern, desc_norm))
-        or bool(re.search(cancelled_pattern, residents_norm))
-    )
+def load_rules():
+    """Load rules from rules.json if present, otherwise use the default rules"""
+    if not os.path.exists(RULES_FILE):
+        return DEFAULT_RULES
+    with open(RULES_FILE, "r", encoding="utf-8") as f:
+        return json.load(f)
 
 
-def load_employees():
-    with open("employees.json", "r", encoding="utf-8") as f:
-        return json.load(f)
+def compile_rules(rules, columns):
+    """
+    Compile rules once into one regex per (column, action).
+
+    All keywords hitting the same column with the same action are merged
+    into a single alternation, so a longer rule list does not mean more
+    passes over the sheet.
+
+    Returns:
+        dict: {column: {action: compiled pattern}}
+    """
+    keywords = {}
+    for rule in rules:
+        action = rule.get("action", "cancel")
+        if action not in RULE_ACTIONS:
+            raise ValueError(
+                f"Unknown action '{action}' in rule '{rule.get('name', '')}'"
+            )
+
+        targets = rule.get("columns")
+        if targets is None:
+            targets = columns
+        for col in targets:
+            if col not in columns:
+                continue
+            bucket = keywords.setdefault(col, {}).setdefault(action, [])
+            for kw in rule.get("keywords", []):
+                kw_norm = normalize_name(kw)
+                if kw_norm and kw_norm not in bucket:
+                    bucket.append(kw_norm)
+
+    compiled = {}
+    for col, actions in keywords.items():
+        for action, kws in actions.items():
+            if kws:
+                pattern = re.compile("|".join(re.escape(k) for k in kws))
+                compiled.setdefault(col, {})[action] = pattern
+    return compiled
+
+
+def evaluate_rules(df, compiled):
+    """
+    Evaluate compiled rules on the whole sheet, column by column.
+
+    Each column is normalized once, then each of its patterns is applied
+    with a vectorized search.
+
+    Returns:
+        dict: {action: list of bool, one per row}
+    """
+    masks = {action: pd.Series(False, index=df.index) for action in RULE_ACTIONS}
+
+    for col, patterns in compiled.items():
+        column_norm = df[col].map(lambda v: normalize_name(clean(v)))
+        for action, pattern in patterns.items():
+            masks[action] |= column_norm.str.contains(pattern, regex=True)
+
+    return {action: mask.tolist() for action, mask in masks.items()}
 
 
 def clean(text):
@@ -47,18 +120,6 @@ def clean(text):
     return str(text).replace("\n", " ").strip()
 
 
-def extract_all_educators_from_activity(text, employees):
-    text_clean = clean(text)
-    text_normalized = normalize_name(text_clean)
-
-    educators = []
-    for full_name in employees:
-        name_normalized = normalize_name(full_name)
-        if name_normalized in text_normalized:
-            educators.append(full_name)
-    return educators
-
-
 def parse_resident_block(text):
     if pd.isna(text):
         lines = []
@@ -77,97 +138,446 @@ def parse_resident_block(text):
     return residents
 
 
-def analyze_excel(path, mode="hard"):
-    df = pd.read_excel(path, header=None)
-    employees = load_employees()
+def rules_columns(rules):
+    """
+    Number of leading columns the analysis needs: A-D plus the columns the
+    rules look at, or None when a rule looks at every column.
+    """
+    needed = 4
+    for rule in rules:
+        if rule.get("columns") is None:
+            return None
+        needed = max([needed] + [int(c) + 1 for c in rule["columns"]])
+    return needed
+
+
+def _read_csv(path):
+    """
+    Read a csv export: convert.py output (",") or a French Excel export (";").
+
+    Rows may have more cells than the first one (trailing columns only
+    filled on some rows), those files are read row by row.
+    """
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        sample = f.read(64 * 1024)
+    try:
+        sep = csv.Sniffer().sniff(sample, delimiters=",;\t").delimiter
+    except csv.Error:
+        sep = ","
+
+    try:
+        return pd.read_csv(
+            path,
+            sep=sep,
+            header=None,
+            dtype=str,
+            keep_default_na=False,
+            na_values=[""],
+            encoding="utf-8-sig",
+        )
+    except pd.errors.ParserError:
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            rows = list(csv.reader(f, delimiter=sep))
+        df = pd.DataFrame(rows, dtype=str)
+        return df.replace("", None)
+
+
+def parse_date(value):
+    """
+    Date of a cell: datetime, ISO text (convert.py) or French text (dd/mm/yyyy).
+
+    Raises:
+        ValueError: not a date
+    """
+    if isinstance(value, str):
+        text = value.strip()
+        try:
+            return datetime.fromisoformat(text).date()
+        except ValueError:
+            # French exports put the day first
+            return pd.to_datetime(text, dayfirst=True).date()
+    return pd.to_datetime(value).date()
+
+
+def read_table(path, max_columns=None):
+    """
+    Read a PEPS export (.xlsx, .csv or .parquet), reader chosen from the extension.
+
+    max_columns limits the columns read from .xlsx files (None = all).
+    """
+    ext = os.path.splitext(path)[1].lower()
+
+    if ext == ".csv":
+        return _read_csv(path)
+    if ext == ".parquet":
+        df = pd.read_parquet(path)
+        # Parquet needs string column names, restore the positional layout
+        df.columns = range(len(df.columns))
+        return df
+    if ext in (".xlsx", ".xlsm"):
+        return read_peps_xlsx(path, max_columns)
+
+    raise ValueError(f"Format de fichier non supporté : {ext}")
+
+
+def convert_table(src, dest):
+    """Convert an export to .csv or .parquet, keeping the same column layout"""
+    df = read_table(src)
+    # Store every cell as text (or empty) so mixed columns survive the conversion
+    df = df.map(lambda v: None if pd.isna(v) else str(v))
+
+    ext = os.path.splitext(dest)[1].lower()
+    if ext == ".csv":
+        df.to_csv(dest, header=False, index=False)
+    elif ext == ".parquet":
+        df.columns = [str(c) for c in df.columns]
+        df.to_parquet(dest, index=False)
+    else:
+        raise ValueError(f"Format de destination non supporté : {ext}")
 
-    activities = []
-    today = datetime.now().date()
 
-    for i in range(len(df)):
-        date_raw = df.iloc[i, 0]
+def _prepare_rows(path, rules):
+    """Read the export and evaluate the rules, one tuple per row"""
+    if rules is None:
+        rules = load_rules()
+
+    # Only the columns the rules need are read (all of them for the default
+    # cancellation rule), so every input format gives the same result
+    df = read_table(path, rules_columns(rules))
+
+    # Skip / cancel rules are evaluated once for the whole sheet
+    masks = evaluate_rules(df, compile_rules(rules, list(df.columns)))
+
+    # Missing trailing columns are read as empty cells
+    df = df.reindex(columns=range(4))
+    return list(zip(df[0], df[1], df[2], df[3], masks["skip"], masks["cancel"]))
+
+
+def _record(date, educators, residents, act, cancelled, check_notes):
+    """
+    Compact summary of an evaluated row, used for statistics.
+
+    Missing individual notes are only recorded when check_notes is set, i.e.
+    where _evaluate_rows flags them (hard mode, general description filled).
+    """
+    if cancelled:
+        status, tag = "cancelled", None
+    elif act is None:
+        status, tag = "ok", None
+    else:
+        status, tag = "incomplete", activity_tag(act)[0]
+
+    return {
+        "date": date.isoformat(),
+        "educators": educators,
+        "status": status,
+        "tag": tag,
+        "missing_notes": [
+            r["name"]
+            for r in residents
+            if check_notes
+            and r["status"].startswith("a participé")
+            and not r["note"].strip()
+        ],
+    }
+
+
+def _evaluate_rows(rows, mode, matcher, today, records=None):
+    """
+    Yield flagged and cancelled activities of rows, in order.
+
+    Returns True (as the generator's return value) when it stopped at a
+    date >= today, rows after it must be ignored. If records is a list, a
+    summary of every evaluated row is appended to it.
+    """
+    for date_raw, activity_raw, desc_raw, residents_block, skipped, cancelled in rows:
         try:
-            date = pd.to_datetime(date_raw).date()
+            date = parse_date(date_raw)
         except:
             continue
 
         if date >= today:
-            break
+            return True
 
-        activity_block = clean(df.iloc[i, 1])
-        desc_general = clean(df.iloc[i, 2])
-        residents_block = df.iloc[i, 3]
+        activity_block = clean(activity_raw)
+        desc_general = clean(desc_raw)
 
         if not activity_block:
             continue
-        if "appel" in activity_block.lower():
+        if skipped:
             continue
 
-        educators = extract_all_educators_from_activity(activity_block, employees)
+        educator_matches = matcher.match(activity_block)
+        educators = [m["name"] for m in educator_matches]
 
         residents = parse_resident_block(residents_block)
 
-        # Check for cancelled using improved detection - check ALL columns in this row
-        row_text = " ".join([clean(df.iloc[i, col]) for col in range(len(df.columns))])
-        if is_activity_cancelled(row_text, "", ""):
-            activities.append(
-                {
-                    "date_obj": date,
-                    "date": date.strftime("%d/%m/%Y"),
-                    "activity": activity_block,
-                    "educators": educators,
-                    "desc": desc_general,
-                    "residents": residents,
-                }
-            )
+        # Cancelled rows were already detected by the rules
+        if cancelled:
+            act = {
+                "date_obj": date,
+                "date": date.strftime("%d/%m/%Y"),
+                "activity": activity_block,
+                "educators": educators,
+                "educator_matches": educator_matches,
+                "desc": desc_general,
+                "residents": residents,
+            }
+            if records is not None:
+                records.append(_record(date, educators, residents, act, True, False))
+            yield act
             continue
 
         # Not cancelled - check for errors based on mode
+        act = None
         errors = []
         participated = any(r["status"].startswith("a participé") for r in residents)
+        # Individual notes are only required in hard mode with a general description
+        check_notes = mode == "hard" and bool(desc_general)
 
         if mode == "soft":
             # Soft mode: only flag if no participation
             if not participated:
-                activities.append(
-                    {
-                        "date_obj": date,
-                        "date": date.strftime("%d/%m/%Y"),
-                        "activity": activity_block,
-                        "educators": educators,
-                        "desc": desc_general,
-                        "residents": residents,
-                        "errors": ["Aucun résident n'a participé"],
-                    }
-                )
+                act = {
+                    "date_obj": date,
+                    "date": date.strftime("%d/%m/%Y"),
+                    "activity": activity_block,
+                    "educators": educators,
+                    "educator_matches": educator_matches,
+                    "desc": desc_general,
+                    "residents": residents,
+                    "errors": ["Aucun résident n'a participé"],
+                }
         else:
             # Hard mode: check both participation and descriptions
             if not participated:
                 errors.append("Aucun résident n'a participé")
-            elif desc_general and participated:
+            elif check_notes:
                 for r in residents:
                     if r["status"].startswith("a participé") and not r["note"].strip():
                         errors.append(f"{r['name']} a participé sans note individuelle")
                         break
 
             if errors:
-                activities.append(
-                    {
-                        "date_obj": date,
-                        "date": date.strftime("%d/%m/%Y"),
-                        "activity": activity_block,
-                        "educators": educators,
-                        "desc": desc_general,
-                        "residents": residents,
-                        "errors": errors,
-                    }
-                )
-
-    # Sort by date (earliest first)
-    activities.sort(key=lambda x: x["date_obj"], reverse=False)
-
-    # Remove the temporary date_obj key
+                act = {
+                    "date_obj": date,
+                    "date": date.strftime("%d/%m/%Y"),
+                    "activity": activity_block,
+                    "educators": educators,
+                    "educator_matches": educator_matches,
+                    "desc": desc_general,
+                    "residents": residents,
+                    "errors": errors,
+                }
+
+        if records is not None:
+            records.append(
+                _record(date, educators, residents, act, False, check_notes)
+            )
+        if act is not None:
+            yield act
+
+    return False
+
+
+def iter_activities(
+    path, mode="hard", rules=None, threshold=DEFAULT_THRESHOLD, records=None
+):
+    """
+    Yield flagged and cancelled activities in sheet order, as they are found.
+
+    Activities still carry their "date_obj" key, used for sorting.
+    threshold is the minimum score of an approximate educator match.
+    records, if given, receives a summary of every evaluated row.
+    """
+    rows = _prepare_rows(path, rules)
+    matcher = EducatorMatcher(load_employees(), threshold)
+    today = datetime.now().date()
+
+    yield from _evaluate_rows(rows, mode, matcher, today, records)
+
+
+# Per worker process state, sent once by the pool initializer
+_worker = {}
+
+
+def _init_worker(mode, matcher, today):
+    _worker["mode"] = mode
+    _worker["matcher"] = matcher
+    _worker["today"] = today
+
+
+def _evaluate_chunk(rows):
+    """Evaluate one chunk in a worker: (activities sorted by date, records, stopped)"""
+    activities = []
+    records = []
+    rows_iter = _evaluate_rows(
+        rows, _worker["mode"], _worker["matcher"], _worker["today"], records
+    )
+    while True:
+        try:
+            activities.append(next(rows_iter))
+        except StopIteration as stop:
+            stopped = stop.value
+            break
+
+    # Stable sort, so equal dates keep their sheet order like the serial path
+    activities.sort(key=lambda x: x["date_obj"])
+    return activities, records, stopped
+
+
+def _analyze_parallel(path, mode, rules, threshold, workers, chunk_size):
+    rows = _prepare_rows(path, rules)
+    matcher = EducatorMatcher(load_employees(), threshold)
+    today = datetime.now().date()
+
+    if chunk_size is None:
+        # A few chunks per worker to even out the load
+        chunk_size = max(1, -(-len(rows) // (workers * 4)))
+    chunks = [rows[i : i + chunk_size] for i in range(0, len(rows), chunk_size)]
+
+    results = []
+    records = []
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(mode, matcher, today),
+    ) as pool:
+        for activities, chunk_records, stopped in pool.map(_evaluate_chunk, chunks):
+            results.append(activities)
+            records.extend(chunk_records)
+            # Same as the serial path: nothing after the first future date
+            if stopped:
+                pool.shutdown(wait=False, cancel_futures=True)
+                break
+
+    # Chunks are in sheet order, merging keeps equal dates in sheet order
+    activities = list(heapq.merge(*results, key=lambda x: x["date_obj"]))
+    return activities, records
+
+
+def analyze_excel(
+    path,
+    mode="hard",
+    rules=None,
+    threshold=DEFAULT_THRESHOLD,
+    workers=None,
+    chunk_size=None,
+):
+    """
+    Analyze an export, activities sorted by date.
+
+    With workers > 1, rows are evaluated in chunks by a process pool (same
+    result as the serial path).
+
+    Returns:
+        tuple: (activities, records) where records summarizes every
+        evaluated row (date, educators, status, tag, missing_notes)
+    """
+    if workers and workers > 1:
+        activities, records = _analyze_parallel(
+            path, mode, rules, threshold, workers, chunk_size
+        )
+    else:
+        records = []
+        activities = list(iter_activities(path, mode, rules, threshold, records))
+
+        # Sort by date (earliest first)
+        activities.sort(key=lambda x: x["date_obj"], reverse=False)
+
+    # Remove the temporary date_obj key, add what the GUI displays
     for act in activities:
         del act["date_obj"]
+        act["display"] = build_display(act)
+
+    return activities, records
+
+
+def _activity_key(act):
+    """Join key of an activity: date + normalized title"""
+    return act["date"], normalize_name(act["activity"])
+
 
-    return activities, []
+def _content_hash(act):
+    """Hash of what was flagged: errors and residents with their notes"""
+    content = json.dumps(
+        [
+            act.get("errors", []),
+            [[r["name"], r["status"], r["note"]] for r in act.get("residents", [])],
+        ],
+        ensure_ascii=False,
+    )
+    return hashlib.sha1(content.encode("utf-8")).hexdigest()
+
+
+def _index_flagged(activities):
+    """Flagged (incomplete) activities grouped by key, in order"""
+    index = {}
+    for act in activities:
+        if "errors" in act:
+            index.setdefault(_activity_key(act), []).append(act)
+    return index
+
+
+def _pair(old_acts, new_acts):
+    """
+    Pair activities sharing a key, identical content first, then in order.
+
+    Returns:
+        list: (old, new, content changed) tuples
+    """
+    remaining_old = [(act, _content_hash(act)) for act in old_acts]
+    remaining_new = []
+    pairs = []
+    for act in new_acts:
+        digest = _content_hash(act)
+        for n, (old, old_digest) in enumerate(remaining_old):
+            if old_digest == digest:
+                del remaining_old[n]
+                pairs.append((old, act, False))
+                break
+        else:
+            remaining_new.append(act)
+    for (old, _), act in zip(remaining_old, remaining_new):
+        pairs.append((old, act, True))
+    return pairs
+
+
+def compare_excel(old_path, new_path, mode="hard", **kwargs):
+    """
+    Compare the flagged activities of two exports.
+
+    Activities are joined on date + title. Duplicates of a key are paired
+    by identical content (errors and residents) first, then in order, so an
+    open flag whose content changed can be told apart. Extra keyword
+    arguments are passed to analyze_excel.
+
+    Returns:
+        dict: {"resolved": [...], "new": [...], "open": [...], "changed": [...]},
+        activities in date order (resolved ones come from the old export),
+        changed are the open flags whose errors or residents differ
+    """
+    old_activities, _ = analyze_excel(old_path, mode, **kwargs)
+    new_activities, _ = analyze_excel(new_path, mode, **kwargs)
+
+    old_index = _index_flagged(old_activities)
+    new_index = _index_flagged(new_activities)
+
+    paired_old = set()
+    open_ids = set()
+    changed_ids = set()
+    for key, new_acts in new_index.items():
+        for old, act, changed in _pair(old_index.get(key, []), new_acts):
+            paired_old.add(id(old))
+            open_ids.add(id(act))
+            if changed:
+                changed_ids.add(id(act))
+
+    flagged_old = [act for act in old_activities if "errors" in act]
+    flagged_new = [act for act in new_activities if "errors" in act]
+    return {
+        "resolved": [act for act in flagged_old if id(act) not in paired_old],
+        "new": [act for act in flagged_new if id(act) not in open_ids],
+        "open": [act for act in flagged_new if id(act) in open_ids],
+        "changed": [act for act in flagged_new if id(act) in changed_ids],
+    }
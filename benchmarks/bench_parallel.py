@@ -0,0 +1,38 @@
+"""Measure analyze_excel speedup against the number of worker processes
+
+Usage: python benchmarks/bench_parallel.py export.xlsx [max_workers]
+
+Run it from the folder holding employees.json.
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from analysis import analyze_excel
+
+
+def main(path, max_workers):
+    start = time.perf_counter()
+    reference, _ = analyze_excel(path)
+    serial = time.perf_counter() - start
+    print(f"serial      {serial:8.2f} s  {len(reference)} activities")
+
+    counts = [2 ** i for i in range(1, max_workers.bit_length()) if 2 ** i < max_workers]
+    for workers in counts + [max_workers]:
+        start = time.perf_counter()
+        activities, _ = analyze_excel(path, workers=workers)
+        elapsed = time.perf_counter() - start
+
+        same = "identical" if activities == reference else "DIFFERENT"
+        print(
+            f"{workers:2d} workers  {elapsed:8.2f} s  x{serial / elapsed:.2f}  ({same})"
+        )
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+    max_workers = int(sys.argv[2]) if len(sys.argv) > 2 else os.cpu_count()
+    main(sys.argv[1], max(max_workers, 2))
@@ -0,0 +1,64 @@
+"""Compare read_peps_xlsx with pd.read_excel (parse time and peak memory)
+
+"read_peps_xlsx (app)" reads the columns the analysis reads with the current
+rules (every column with the default cancellation rule), "read_peps_xlsx A-D"
+only the four columns the analysis itself needs.
+
+Usage: python benchmarks/bench_xlsx_reader.py export.xlsx [export2.xlsx ...]
+"""
+import os
+import sys
+import time
+import tracemalloc
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from analysis import load_rules, rules_columns
+from xlsx_reader import read_peps_xlsx
+
+
+def measure(func, path):
+    """Return (seconds, peak MB, number of rows)"""
+    # Timing and memory are measured in separate runs, tracemalloc slows
+    # down pure Python code a lot more than C code
+    start = time.perf_counter()
+    df = func(path)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    func(path)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak / (1024 * 1024), len(df)
+
+
+def main(paths):
+    max_columns = rules_columns(load_rules())
+    readers = [
+        ("pd.read_excel", lambda p: pd.read_excel(p, header=None)),
+        ("read_peps_xlsx (app)", lambda p: read_peps_xlsx(p, max_columns)),
+        ("read_peps_xlsx A-D", lambda p: read_peps_xlsx(p, 4)),
+    ]
+    for path in paths:
+        size = os.path.getsize(path) / (1024 * 1024)
+        print(f"{path} ({size:.1f} MB)")
+        results = {}
+        for name, func in readers:
+            elapsed, peak, rows = measure(func, path)
+            results[name] = (elapsed, peak)
+            print(f"  {name:<22} {elapsed:8.2f} s  {peak:8.1f} MB peak  {rows} rows")
+
+        base = results["pd.read_excel"]
+        for name, (elapsed, peak) in list(results.items())[1:]:
+            print(
+                f"  {name:<22} speedup x{base[0] / elapsed:.1f},"
+                f" memory x{base[1] / peak:.1f}"
+            )
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+    main(sys.argv[1:])
@@ -0,0 +1,64 @@
+"""Check EducatorMatcher on titles that used to match the wrong educator
+
+One-letter words ("à", "y") must not be taken for initials, abbreviations
+("C.", "J.-P.") must. The display title must keep the words that are not
+part of a name.
+
+Usage: python benchmarks/check_matcher.py
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from display import build_display
+from matcher import EducatorMatcher
+
+EMPLOYEES = [
+    "Dupont Nicolas",
+    "Dupont Alain",
+    "Leroy Yves",
+    "Clément Nicolas",
+    "Pierre-Jean Martin",
+]
+
+# (title, expected educators, expected display title)
+CASES = [
+    ("Sortie à la mer Dupont Nicolas", ["Dupont Nicolas"], "Sortie à la mer"),
+    ("Jeux y compris Leroy", [], "Jeux y compris Leroy"),
+    ("Sortie Y Leroy", [], "Sortie Y Leroy"),
+    ("Piscine C. Nicolas", ["Clément Nicolas"], "Piscine"),
+    ("Atelier P.-J. Martin", ["Pierre-Jean Martin"], "Atelier"),
+    ("Cuisine Dupont A.", ["Dupont Alain"], "Cuisine"),
+]
+
+
+def main():
+    matcher = EducatorMatcher(EMPLOYEES)
+
+    failed = False
+    for title, expected, expected_title in CASES:
+        matches = matcher.match(title)
+        educators = [m["name"] for m in matches]
+        act = {
+            "date": "05/01/2024",
+            "activity": title,
+            "educators": educators,
+            "educator_matches": matches,
+            "desc": "",
+            "residents": [],
+            "errors": [],
+        }
+        display_title = build_display(act)["title"]
+
+        ok = educators == expected and display_title == expected_title
+        print(f"{title:<35} {'ok' if ok else 'FAILED'}")
+        if not ok:
+            print(f"    educators {educators}, expected {expected}")
+            print(f"    title {display_title!r}, expected {expected_title!r}")
+        failed = failed or not ok
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,123 @@
+"""Check that read_peps_xlsx reads the same cells as pd.read_excel
+
+Builds small workbooks covering shared and inline strings, ISO and serial
+dates, the 1904 date system and sparse cells, then compares both readers.
+
+Usage: python benchmarks/check_xlsx_reader.py
+"""
+import os
+import re
+import sys
+import tempfile
+import zipfile
+from datetime import datetime
+
+import openpyxl
+import pandas as pd
+from openpyxl.utils.datetime import CALENDAR_MAC_1904
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from xlsx_reader import read_peps_xlsx
+
+ROWS = [
+    ["Date", "Activité", "Description", "Résidents"],
+    [datetime(2024, 1, 5), "Piscine Dupont Nicolas", "Bonne séance", "Jean a participé : ok"],
+    [datetime(2024, 1, 6, 14, 30), "Cuisine", None, "Marie a participé\nPaul"],
+    [datetime(2024, 1, 7), "Sortie", "", None, None, "ANNULÉ"],
+]
+
+
+def _build(path, iso_dates=False, date1904=False):
+    wb = openpyxl.Workbook(iso_dates=iso_dates)
+    if date1904:
+        wb.epoch = CALENDAR_MAC_1904
+    ws = wb.active
+    for row in ROWS:
+        ws.append(row)
+    # Sparse cells: gap inside a row, empty rows, a cell far to the right
+    ws["B10"] = "Seule cellule"
+    ws["A12"] = datetime(2024, 2, 1)
+    ws["D12"] = "Luc a participé"
+    ws["H13"] = 42
+    ws["C14"] = 3.5
+    wb.save(path)
+
+
+def _inline_strings(path):
+    """Rewrite the shared string cell B2 as an inline string"""
+    with zipfile.ZipFile(path) as zf:
+        files = {name: zf.read(name) for name in zf.namelist()}
+
+    sheet = files["xl/worksheets/sheet1.xml"].decode("utf-8")
+    sheet = re.sub(
+        r'<c r="B2"([^>]*) t="s"><v>\d+</v></c>',
+        r'<c r="B2"\1 t="inlineStr"><is><t>Texte inline</t></is></c>',
+        sheet,
+    )
+    assert "inlineStr" in sheet, "B2 was not rewritten"
+    files["xl/worksheets/sheet1.xml"] = sheet.encode("utf-8")
+
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zf:
+        for name, data in files.items():
+            zf.writestr(name, data)
+
+
+def _same(a, b):
+    if pd.isna(a) and pd.isna(b):
+        return True
+    if isinstance(a, datetime) or isinstance(b, datetime):
+        return pd.Timestamp(a) == pd.Timestamp(b)
+    return a == b
+
+
+def compare(path, max_columns=None):
+    expected = pd.read_excel(path, header=None)
+    if max_columns is not None:
+        expected = expected.iloc[:, :max_columns]
+    expected = expected.dropna(how="all").reset_index(drop=True)
+    actual = read_peps_xlsx(path, max_columns)
+
+    errors = []
+    if expected.shape != actual.shape:
+        errors.append(f"shape {actual.shape} instead of {expected.shape}")
+    else:
+        for i in range(expected.shape[0]):
+            for j in range(expected.shape[1]):
+                a, e = actual.iat[i, j], expected.iat[i, j]
+                # Without styles, only column A is decoded as dates
+                if j != 0 and isinstance(e, datetime) and not isinstance(a, datetime):
+                    continue
+                if not _same(a, e):
+                    errors.append(f"cell ({i}, {j}): {a!r} instead of {e!r}")
+    return errors
+
+
+def main():
+    cases = [
+        ("serial dates", {}, False),
+        ("ISO dates", {"iso_dates": True}, False),
+        ("1904 date system", {"date1904": True}, False),
+        ("inline strings", {}, True),
+    ]
+
+    failed = False
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, options, inline in cases:
+            path = os.path.join(tmp, "check.xlsx")
+            _build(path, **options)
+            if inline:
+                _inline_strings(path)
+
+            for max_columns in (None, 4):
+                errors = compare(path, max_columns)
+                status = "ok" if not errors else "FAILED"
+                print(f"{name:<18} max_columns={max_columns}: {status}")
+                for error in errors:
+                    print(f"    {error}")
+                failed = failed or bool(errors)
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,40 @@
+# convert.py - convert PEPS xlsx exports to faster formats (csv / parquet)
+import argparse
+import os
+import sys
+
+from analysis import convert_table
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Convertit des exports PEPS .xlsx en .csv ou .parquet"
+    )
+    parser.add_argument("files", nargs="+", help="Fichiers .xlsx à convertir")
+    parser.add_argument(
+        "--to", choices=["csv", "parquet"], default="parquet", help="Format cible"
+    )
+    args = parser.parse_args(argv)
+
+    failed = False
+    for src in args.files:
+        base, ext = os.path.splitext(src)
+        if ext.lower() not in (".xlsx", ".xlsm"):
+            # Also protects csv / parquet sources from being overwritten
+            print(f"Ignoré {src}: seuls les fichiers .xlsx sont convertis", file=sys.stderr)
+            failed = True
+            continue
+
+        dest = base + "." + args.to
+        try:
+            convert_table(src, dest)
+            print(f"{src} -> {dest}")
+        except Exception as e:
+            print(f"Erreur {src}: {str(e)}", file=sys.stderr)
+            failed = True
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,176 @@
+# display.py - display model computed once per activity during analysis
+import re
+import unicodedata
+
+
+# --------------------------------------------------------
+#  FONCTION de nettoyage 100% fiable
+# --------------------------------------------------------
+def normalize(text):
+    if not text:
+        return ""
+
+    # Remove all weird whitespaces
+    text = text.replace("\n", " ").replace("\r", " ").replace("\t", " ")
+
+    # Replace ALL unicode spaces by normal spaces
+    text = re.sub(r"\s+", " ", text)
+
+    # Replace ALL hyphens by a normal hyphen
+    text = re.sub(r"[‐-‒–—−]", "-", text)  # all unicode hyphens
+
+    # Lowercase
+    text = text.lower()
+
+    # Remove accents
+    text = "".join(
+        c for c in unicodedata.normalize("NFD", text) if unicodedata.category(c) != "Mn"
+    )
+
+    # Strip
+    return text.strip()
+
+
+def remove_educators_from_activity(activity, educators, matched_words=()):
+    activity_norm = normalize(activity)
+    tokens = set()
+
+    # Words found by approximate matching ("C.", misspelled names)
+    for word in matched_words:
+        tokens.add(normalize(word))
+
+    for emp in educators:
+        emp_norm = normalize(emp)
+        tokens.add(emp_norm)
+        for p in emp_norm.split():
+            tokens.add(p)
+
+    cleaned_words = []
+    for word in re.split(r"\s+", activity):
+        if normalize(word) not in tokens:
+            cleaned_words.append(word)
+
+    result = " ".join(cleaned_words)
+    return " ".join(result.split())
+
+
+def activity_tag(act):
+    """Return (tag text, tag colour) for the activity list"""
+    # CANCELLED HAS PRIORITY: if no errors key, it's cancelled
+    if "errors" not in act:
+        return "Annulée", "#4a4a4a"
+    if act["errors"]:
+        # Get tag based on error type
+        if "Aucun" in act["errors"][0]:
+            return "Présences", "#6b1a1a"
+        if "note" in act["errors"][0].lower():
+            return "Notes", "#5a4a1a"
+        return "Incomplet", "#6b1a1a"
+    # Soft mode: incomplete because no participation
+    return "Présences", "#6b1a1a"
+
+
+def correction_message(act):
+    """Reason given in the reminder mail"""
+    if act.get("errors"):
+        if "Aucun" in act["errors"][0]:
+            return "Il faut corriger la participation."
+        if "note" in act["errors"][0].lower():
+            return "Il faut corriger les descriptions générales et / ou individuelles."
+        return ""
+    # Soft mode: no participation
+    return "Il faut corriger la participation des résidents."
+
+
+def details_text(act):
+    txt = f"{act['activity']}\nDate : {act['date']}\n\n"
+    txt += "Description générale:\n"
+    txt += (act.get("desc") or "—") + "\n\n"
+
+    # Educators found by approximate matching, with their confidence
+    approximate = [m for m in act.get("educator_matches", []) if m["score"] < 1]
+    if approximate:
+        txt += "Éducateurs reconnus approximativement :\n"
+        for m in approximate:
+            txt += f"• {m['name']} ({round(m['score'] * 100)} %)\n"
+        txt += "\n"
+
+    # Only show residents if they exist
+    if act.get("residents"):
+        txt += "Résidents :\n"
+        seen = set()
+        for r in act.get("residents", []):
+            if r["name"] not in seen:
+                seen.add(r["name"])
+                line = f"\n• {r['name']}"
+                if r["status"] == "a participé":
+                    line += " (a participé)"
+                    if r["note"]:
+                        line += f" : {r['note']}"
+                txt += line + "\n"
+    return txt
+
+
+def reminder_body(act, correction_msg):
+    """Mail body after the greeting line"""
+    body = f"""Moyen que tu complètes tes encodages stp:
+
+- {act['date']} : {act['activity']}"""
+
+    if correction_msg:
+        body += f"\n{correction_msg}"
+
+    body += """\n\nN'hésite pas si tu as des questions.
+Bien à toi,"""
+    return body
+
+
+def build_display(act):
+    """
+    Everything the GUI shows for an activity, computed once.
+
+    The reminder is stored with and without the correction message, the GUI
+    only adds the greeting with the selected educator's first name.
+    """
+    matched_words = [w for m in act.get("educator_matches", []) for w in m["words"]]
+    title = remove_educators_from_activity(
+        act["activity"], act["educators"], matched_words
+    )
+    tag, tag_color = activity_tag(act)
+
+    return {
+        "title": title,
+        "button_text": f"{title}\n{', '.join(act['educators'])}\n{act['date']}",
+        "tag": tag,
+        "tag_color": tag_color,
+        "details": details_text(act),
+        "reminder": reminder_body(act, correction_message(act)),
+        "reminder_plain": reminder_body(act, ""),
+    }
+
+
+def comparison_text(result):
+    """Text of the comparison view (see analysis.compare_excel)"""
+    sections = [
+        ("new", "Nouvelles"),
+        ("open", "Toujours ouvertes"),
+        ("resolved", "Corrigées"),
+    ]
+
+    changed = {id(act) for act in result.get("changed", [])}
+
+    txt = ""
+    for key, label in sections:
+        txt += f"{label} : {len(result[key])}\n"
+        if key == "open" and changed:
+            txt += f"  dont modifiées : {len(changed)}\n"
+    for key, label in sections:
+        txt += f"\n{label} :\n"
+        for act in result[key]:
+            txt += f"• {act['date']} : {act['activity']}"
+            if act["errors"]:
+                txt += f" — {act['errors'][0]}"
+            if id(act) in changed:
+                txt += " (modifiée)"
+            txt += "\n"
+    return txt
@@ -0,0 +1,150 @@
+# export.py - stream analysis results to CSV, JSON Lines or xlsx
+import argparse
+import csv
+import json
+import os
+import sys
+
+from analysis import iter_activities
+
+EXPORT_COLUMNS = [
+    "date",
+    "activite",
+    "statut",
+    "educateurs",
+    "erreurs",
+    "description",
+    "participants",
+    "nb_residents",
+    "residents",
+]
+
+EXPORT_FORMATS = {".csv": "csv", ".jsonl": "jsonl", ".xlsx": "xlsx"}
+
+
+def flatten_activity(act):
+    """Flatten an activity into one row of EXPORT_COLUMNS"""
+    residents = act.get("residents", [])
+    participants = [r for r in residents if r["status"] == "a participé"]
+
+    resident_parts = []
+    for r in residents:
+        part = r["name"]
+        if r["status"] == "a participé":
+            part += " (a participé)"
+            if r["note"]:
+                part += f" : {r['note']}"
+        resident_parts.append(part)
+
+    return {
+        "date": act["date"],
+        "activite": act["activity"],
+        "statut": "Annulée" if "errors" not in act else "Incomplète",
+        "educateurs": ", ".join(act.get("educators", [])),
+        "erreurs": "; ".join(act.get("errors", [])),
+        "description": act.get("desc", ""),
+        "participants": len(participants),
+        "nb_residents": len(residents),
+        "residents": " | ".join(resident_parts),
+    }
+
+
+def _write_csv(rows, path):
+    # utf-8-sig so Excel opens accents correctly
+    with open(path, "w", encoding="utf-8-sig", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=EXPORT_COLUMNS, delimiter=";")
+        writer.writeheader()
+        for row in rows:
+            writer.writerow(row)
+
+
+def _write_jsonl(rows, path):
+    with open(path, "w", encoding="utf-8") as f:
+        for row in rows:
+            f.write(json.dumps(row, ensure_ascii=False) + "\n")
+
+
+def _write_xlsx(rows, path):
+    from openpyxl import Workbook
+    from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+
+    # Write-only mode streams rows to disk instead of keeping cells in memory
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Rapport")
+    ws.append(EXPORT_COLUMNS)
+    try:
+        for row in rows:
+            ws.append(
+                [
+                    ILLEGAL_CHARACTERS_RE.sub("", v) if isinstance(v, str) else v
+                    for v in (row[col] for col in EXPORT_COLUMNS)
+                ]
+            )
+    finally:
+        # Also on errors: closes the sheet stream, the caller drops the file
+        wb.save(path)
+
+
+def export_activities(activities, path):
+    """
+    Write activities to path, one row at a time.
+
+    activities can be any iterable (ex: iter_activities, in sheet order),
+    rows are written as they come so memory does not grow with the result set.
+    The format is chosen from the extension (.csv, .jsonl or .xlsx). Rows go
+    to a temporary file renamed at the end, a failure leaves no half report.
+
+    Returns:
+        int: number of exported activities
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext not in EXPORT_FORMATS:
+        raise ValueError(f"Format d'export non supporté : {ext}")
+
+    count = 0
+
+    def rows():
+        nonlocal count
+        for act in activities:
+            count += 1
+            yield flatten_activity(act)
+
+    writer = {"csv": _write_csv, "jsonl": _write_jsonl, "xlsx": _write_xlsx}
+    tmp_path = path + ".part"
+    try:
+        writer[EXPORT_FORMATS[ext]](rows(), tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Exporte les activités incomplètes et annulées d'un export PEPS"
+    )
+    parser.add_argument("source", help="Export PEPS (.xlsx, .csv ou .parquet)")
+    parser.add_argument("dest", help="Rapport (.csv, .jsonl ou .xlsx)")
+    parser.add_argument("--mode", choices=["soft", "hard"], default="hard")
+    args = parser.parse_args(argv)
+
+    # Checked before iter_activities starts reading the workbook
+    ext = os.path.splitext(args.dest)[1].lower()
+    if ext not in EXPORT_FORMATS:
+        print(
+            f"Erreur {args.dest}: format d'export non supporté ({ext})", file=sys.stderr
+        )
+        return 1
+
+    try:
+        count = export_activities(iter_activities(args.source, args.mode), args.dest)
+    except Exception as e:
+        print(f"Erreur {args.source}: {str(e)}", file=sys.stderr)
+        return 1
+    print(f"{count} activités exportées -> {args.dest}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,63 +2,18 @@ import customtkinter as ctk
 from tkinter import filedialog, messagebox
 import json
 import os
-import re
-from analysis import analyze_excel, load_employees, is_activity_cancelled
+from analysis import analyze_excel, compare_excel, load_employees
 from mail_sender import send_email_outlook
-import unicodedata
+from export import export_activities
+from server import analyze_remote
+from stats import compute_statistics, format_statistics
+from display import comparison_text
 
 
 ctk.set_appearance_mode("dark")
 ctk.set_default_color_theme("blue")
 
 
-# --------------------------------------------------------
-#  FONCTION de nettoyage 100% fiable
-# --------------------------------------------------------
-def normalize(text):
-    if not text:
-        return ""
-
-    # Remove all weird whitespaces
-    text = text.replace("\n", " ").replace("\r", " ").replace("\t", " ")
-
-    # Replace ALL unicode spaces by normal spaces
-    text = re.sub(r"\s+", " ", text)
-
-    # Replace ALL hyphens by a normal hyphen
-    text = re.sub(r"[‐-‒–—−]", "-", text)  # all unicode hyphens
-
-    # Lowercase
-    text = text.lower()
-
-    # Remove accents
-    text = "".join(
-        c for c in unicodedata.normalize("NFD", text) if unicodedata.category(c) != "Mn"
-    )
-
-    # Strip
-    return text.strip()
-
-
-def remove_educators_from_activity(activity, educators):
-    activity_norm = normalize(activity)
-    tokens = set()
-
-    for emp in educators:
-        emp_norm = normalize(emp)
-        tokens.add(emp_norm)
-        for p in emp_norm.split():
-            tokens.add(p)
-
-    cleaned_words = []
-    for word in re.split(r"\s+", activity):
-        if normalize(word) not in tokens:
-            cleaned_words.append(word)
-
-    result = " ".join(cleaned_words)
-    return " ".join(result.split())
-
-
 # --------------------------------------------------------
 #  GUI CLASS
 # --------------------------------------------------------
@@ -70,6 +25,7 @@ class PepsGUI(ctk.CTk):
 
         self.mode = ctk.StringVar(value="hard")
         self.activities = []
+        self.statistics_text = ""
         self.current_cc = ""
         self.current_act = None
         self.selected_educator = None
@@ -102,8 +58,20 @@ class PepsGUI(ctk.CTk):
             left, text="Full Check (+ descriptions)", variable=self.mode, value="hard"
         ).pack(anchor="w", padx=10)
 
+        # Optional analysis server (see server.py), empty = local analysis
+        self.server_entry = ctk.CTkEntry(
+            left, placeholder_text="Serveur d'analyse (optionnel)", height=26
+        )
+        self.server_entry.pack(pady=(10, 0), padx=5, fill="x")
+        if os.environ.get("PEPS_SERVER_URL"):
+            self.server_entry.insert(0, os.environ["PEPS_SERVER_URL"])
+
         ctk.CTkButton(left, text="📁 Charger Excel", command=self.load_excel).pack(
-            pady=15, padx=5, fill="x"
+            pady=(15, 5), padx=5, fill="x"
+        )
+
+        ctk.CTkButton(left, text="💾 Exporter rapport", command=self.export_report).pack(
+            pady=(0, 15), padx=5, fill="x"
         )
 
         self.stats_incomplete = ctk.CTkLabel(
@@ -118,6 +86,14 @@ class PepsGUI(ctk.CTk):
         self.stats_cancelled.pack(anchor="w", padx=10, pady=2)
         self.stats_total.pack(anchor="w", padx=10, pady=2)
 
+        ctk.CTkButton(left, text="📊 Statistiques", command=self.show_statistics).pack(
+            pady=(10, 0), padx=5, fill="x"
+        )
+
+        ctk.CTkButton(left, text="🔀 Comparer exports", command=self.compare_exports).pack(
+            pady=(5, 0), padx=5, fill="x"
+        )
+
         # Correction toggle button
         self.correction_button = ctk.CTkButton(
             left,
@@ -267,32 +243,127 @@ class PepsGUI(ctk.CTk):
     #   LOAD EXCEL
     # --------------------------------------------------------
     def load_excel(self):
-        path = filedialog.askopenfilename(filetypes=[("Excel Files", "*.xlsx")])
+        path = filedialog.askopenfilename(
+            filetypes=[
+                ("PEPS Exports", "*.xlsx *.csv *.parquet"),
+                ("Excel Files", "*.xlsx"),
+                ("CSV Files", "*.csv"),
+                ("Parquet Files", "*.parquet"),
+            ]
+        )
         if not path:
             return
 
-        activities, _ = analyze_excel(path, self.mode.get())
-        self.activities = activities
-
-        # Count incomplete and cancelled
-        incomplete_count = 0
-        cancelled_count = 0
+        activities = None
+        server_url = self.server_entry.get().strip()
+        if server_url:
+            try:
+                activities, statistics = analyze_remote(
+                    server_url, path, self.mode.get()
+                )
+            except (OSError, ValueError) as e:
+                messagebox.showwarning(
+                    "Serveur indisponible",
+                    f"{str(e)}\n\nL'analyse sera faite localement.",
+                )
 
-        for act in activities:
-            # Check if cancelled (has no errors key = it's a cancelled activity)
-            is_cancelled = "errors" not in act
+        if activities is None:
+            activities, records = analyze_excel(path, self.mode.get())
+            statistics = compute_statistics(records)
+        self.activities = activities
 
-            if is_cancelled:
-                cancelled_count += 1
-            else:
-                incomplete_count += 1
+        # Statistics are computed once per load, the panel only shows them
+        self.statistics_text = format_statistics(statistics)
 
-        self.stats_incomplete.configure(text=f"Incomplètes : {incomplete_count}")
-        self.stats_cancelled.configure(text=f"Annulées : {cancelled_count}")
+        self.stats_incomplete.configure(
+            text=f"Incomplètes : {statistics['incomplete']}"
+        )
+        self.stats_cancelled.configure(text=f"Annulées : {statistics['cancelled']}")
         self.stats_total.configure(text=f"Total : {len(self.activities)}")
 
         self.populate_activity_list()
 
+    # --------------------------------------------------------
+    #   STATISTICS WINDOW
+    # --------------------------------------------------------
+    def show_statistics(self):
+        if not self.statistics_text:
+            messagebox.showerror("Erreur", "Chargez d'abord un fichier")
+            return
+
+        stats_window = ctk.CTkToplevel(self)
+        stats_window.title("Statistiques")
+        stats_window.geometry("600x600")
+
+        ctk.CTkLabel(
+            stats_window, text="Statistiques", font=("Arial", 14, "bold")
+        ).pack(pady=5)
+        text = ctk.CTkTextbox(stats_window, font=("Consolas", 12))
+        text.pack(fill="both", expand=True, padx=10, pady=5)
+        text.insert("1.0", self.statistics_text)
+        text.configure(state="disabled")
+
+    # --------------------------------------------------------
+    #   COMPARE TWO EXPORTS
+    # --------------------------------------------------------
+    def compare_exports(self):
+        filetypes = [("PEPS Exports", "*.xlsx *.csv *.parquet")]
+        old_path = filedialog.askopenfilename(
+            title="Export précédent", filetypes=filetypes
+        )
+        if not old_path:
+            return
+        new_path = filedialog.askopenfilename(title="Nouvel export", filetypes=filetypes)
+        if not new_path:
+            return
+
+        try:
+            result = compare_excel(old_path, new_path, self.mode.get())
+        except Exception as e:
+            messagebox.showerror("Erreur", f"Comparaison impossible : {str(e)}")
+            return
+
+        compare_window = ctk.CTkToplevel(self)
+        compare_window.title("Comparaison des exports")
+        compare_window.geometry("700x600")
+
+        ctk.CTkLabel(
+            compare_window,
+            text=f"{os.path.basename(old_path)} → {os.path.basename(new_path)}",
+            font=("Arial", 14, "bold"),
+        ).pack(pady=5)
+        text = ctk.CTkTextbox(compare_window, font=("Consolas", 12), wrap="word")
+        text.pack(fill="both", expand=True, padx=10, pady=5)
+        text.insert("1.0", comparison_text(result))
+        text.configure(state="disabled")
+
+    # --------------------------------------------------------
+    #   EXPORT REPORT
+    # --------------------------------------------------------
+    def export_report(self):
+        if not self.activities:
+            messagebox.showerror("Erreur", "Aucune activité à exporter")
+            return
+
+        path = filedialog.asksaveasfilename(
+            defaultextension=".xlsx",
+            filetypes=[
+                ("Excel Files", "*.xlsx"),
+                ("CSV Files", "*.csv"),
+                ("JSON Lines", "*.jsonl"),
+            ],
+        )
+        if not path:
+            return
+
+        try:
+            count = export_activities(self.activities, path)
+        except Exception as e:
+            messagebox.showerror("Erreur", f"Export impossible : {str(e)}")
+            return
+
+        messagebox.showinfo("Succès", f"{count} activités exportées")
+
     # --------------------------------------------------------
     #   POPULATE ACTIVITIES
     # --------------------------------------------------------
@@ -301,37 +372,10 @@ class PepsGUI(ctk.CTk):
             widget.destroy()
 
         for act in self.activities:
-            # Remove educators from line 1
-            activity_clean = remove_educators_from_activity(
-                act["activity"], act["educators"]
-            )
-            educators_line = ", ".join(act["educators"])
-
-            button_text = f"{activity_clean}\n{educators_line}\n{act['date']}"
-
-            # Determine tag and color based on activity type
-            tag_text = ""
-            tag_color = "#303030"
-
-            # CANCELLED HAS PRIORITY: if no errors key, it's cancelled
-            if "errors" not in act:
-                tag_text = "Annulée"
-                tag_color = "#4a4a4a"
-            elif act.get("errors"):
-                # Get tag based on error type
-                if "Aucun" in act["errors"][0]:
-                    tag_text = "Présences"
-                    tag_color = "#6b1a1a"
-                elif "note" in act["errors"][0].lower():
-                    tag_text = "Notes"
-                    tag_color = "#5a4a1a"
-                else:
-                    tag_text = "Incomplet"
-                    tag_color = "#6b1a1a"
-            else:
-                # Soft mode: incomplete because no participation
-                tag_text = "Présences"
-                tag_color = "#6b1a1a"
+            display = act["display"]
+            button_text = display["button_text"]
+            tag_text = display["tag"]
+            tag_color = display["tag_color"]
 
             # Create frame for button + tag
             frame = ctk.CTkFrame(self.act_list, fg_color="transparent")
@@ -400,25 +444,7 @@ class PepsGUI(ctk.CTk):
         self.activity_details.configure(state="normal")
         self.activity_details.delete("1.0", "end")
 
-        txt = f"{act['activity']}\nDate : {act['date']}\n\n"
-        txt += "Description générale:\n"
-        txt += (act.get("desc") or "—") + "\n\n"
-
-        # Only show residents if they exist
-        if act.get("residents"):
-            txt += "Résidents :\n"
-            seen = set()
-            for r in act.get("residents", []):
-                if r["name"] not in seen:
-                    seen.add(r["name"])
-                    line = f"\n• {r['name']}"
-                    if r["status"] == "a participé":
-                        line += " (a participé)"
-                        if r["note"]:
-                            line += f" : {r['note']}"
-                    txt += line + "\n"
-
-        self.activity_details.insert("end", txt)
+        self.activity_details.insert("end", act["display"]["details"])
         self.activity_details.configure(state="disabled")
 
         # MAIL
@@ -497,30 +523,13 @@ class PepsGUI(ctk.CTk):
 
         first_name = name.split()[-1]
 
-        # Determine correction message based on error type (only if enabled)
-        correction_msg = ""
+        # Precomputed body, with or without the correction message
+        display = self.current_act["display"]
         if self.include_corrections:
-            if self.current_act.get("errors"):
-                if "Aucun" in self.current_act["errors"][0]:
-                    correction_msg = "Il faut corriger la participation."
-                elif "note" in self.current_act["errors"][0].lower():
-                    correction_msg = "Il faut corriger les descriptions générales et / ou individuelles."
-            else:
-                # Soft mode: no participation
-                correction_msg = "Il faut corriger la participation des résidents."
-
-        # Build body with context-specific message
-        body = f"""Salut {first_name},
-
-Moyen que tu complètes tes encodages stp:
-
-- {self.current_act['date']} : {self.current_act['activity']}"""
-
-        if correction_msg:
-            body += f"\n{correction_msg}"
-
-        body += """\n\nN'hésite pas si tu as des questions.
-Bien à toi,"""
+            reminder = display["reminder"]
+        else:
+            reminder = display["reminder_plain"]
+        body = f"Salut {first_name},\n\n{reminder}"
 
         self.mail_text.delete("1.0", "end")
         self.mail_text.insert("end", body)
@@ -0,0 +1,206 @@
+# matcher.py - approximate educator matching with a trigram index
+import re
+from collections import defaultdict
+
+from display import normalize
+
+DEFAULT_THRESHOLD = 0.8
+
+# Score given to an initial ("C." for "Clément")
+INITIAL_SCORE = 0.9
+
+WORD_SPLIT = re.compile(r"[\s\-]+")
+PUNCTUATION = ".,;:!?()[]{}'\"/"
+
+# An initial is an abbreviation: uppercase letter + "." ("C.", "J.-P.").
+# One-letter words ("à", "y") are not initials.
+INITIAL = re.compile(r"(?<![^\W\d_])([^\W\d_])\.")
+
+
+def _parts(text):
+    """Normalized name parts of a text, hyphenated names are split"""
+    return [p for p in (w.strip(PUNCTUATION) for w in WORD_SPLIT.split(text)) if p]
+
+
+def _initials(raw):
+    """Normalized letters written as initials in a raw word"""
+    return {
+        normalize(m.group(1)) for m in INITIAL.finditer(raw) if m.group(1).isupper()
+    }
+
+
+def _trigrams(word):
+    padded = f"${word}$"
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+def _similarity(a, b):
+    """1 - normalized Levenshtein distance"""
+    if a == b:
+        return 1.0
+    longest = max(len(a), len(b))
+    if abs(len(a) - len(b)) > longest // 3:
+        return 0.0
+
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(
+                min(
+                    previous[j] + 1,
+                    current[j - 1] + 1,
+                    previous[j - 1] + (ca != cb),
+                )
+            )
+        previous = current
+    return 1 - previous[-1] / longest
+
+
+class EducatorMatcher:
+    """
+    Find employees named in an activity title, exactly or approximately.
+
+    Employee name parts are indexed by trigram. An edit changes at most 3
+    trigrams, so a part can only reach the threshold on a word sharing enough
+    trigrams with it: only employees whose every part passes this filter are
+    scored. Every name part must be found above the threshold (typos, missing
+    hyphen, initials like "C. Nicolas"), and the score is the mean similarity
+    of the parts.
+    """
+
+    def __init__(self, employees, threshold=DEFAULT_THRESHOLD):
+        self.threshold = threshold
+        self.names = list(employees)
+        self.normalized = [normalize(name) for name in self.names]
+        self.parts = [_parts(name) for name in self.normalized]
+
+        # trigram -> [(employee, part index)]
+        self.index = defaultdict(list)
+        self.gram_counts = []
+        for i, parts in enumerate(self.parts):
+            counts = []
+            for p, part in enumerate(parts):
+                grams = _trigrams(part)
+                counts.append(len(grams))
+                for gram in grams:
+                    self.index[gram].append((i, p))
+            self.gram_counts.append(counts)
+
+    def match(self, text):
+        """
+        Returns:
+            list: [{"name", "score", "words"}] in employees order, where
+            words are the words of text that matched the name
+        """
+        text_norm = normalize(text)
+
+        # (normalized part, original word, is an initial) for every word
+        words = []
+        for raw in text.split():
+            initials = _initials(raw)
+            for part in _parts(normalize(raw)):
+                words.append((part, raw, len(part) == 1 and part in initials))
+
+        passed = defaultdict(set)  # employee -> parts that can match a word
+        for word, _, _ in words:
+            shared = defaultdict(int)
+            for gram in _trigrams(word):
+                for key in self.index.get(gram, ()):
+                    shared[key] += 1
+            required = {}  # (part length, part trigrams) -> shared trigrams needed
+            for (i, p), count in shared.items():
+                found_parts = passed[i]
+                key = (len(self.parts[i][p]), self.gram_counts[i][p])
+                if key not in required:
+                    required[key] = self._required(*key, len(word))
+                if count >= required[key]:
+                    found_parts.add(p)
+
+        # Initials ("C.") share no trigram with the name part
+        initials = set()
+        if INITIAL_SCORE >= self.threshold:
+            initials = {word for word, _, initial in words if initial}
+
+        candidates = set()
+        for i, found_parts in passed.items():
+            parts = self.parts[i]
+            if found_parts and all(
+                p in found_parts or parts[p][0] in initials for p in range(len(parts))
+            ):
+                candidates.add(i)
+            elif self.normalized[i] in text_norm:
+                # Exact name inside a longer word (previous behaviour)
+                candidates.add(i)
+
+        found = []  # (employee, score, exact, matched word positions)
+        for i in sorted(candidates):
+            score, exact, positions = self._score(i, text_norm, words)
+            if score >= self.threshold:
+                found.append((i, score, exact, positions))
+
+        matches = []
+        for i, score, exact, positions in found:
+            # An approximate match covered by a longer one is a false positive
+            # (ex: "Martin Claire" inside "Martin Leroy Claire")
+            if not exact and any(
+                positions < other or (other_exact and positions <= other)
+                for j, _, other_exact, other in found
+                if j != i
+            ):
+                continue
+
+            matched_words = []
+            for pos in sorted(positions):
+                if words[pos][1] not in matched_words:
+                    matched_words.append(words[pos][1])
+            matches.append(
+                {"name": self.names[i], "score": round(score, 2), "words": matched_words}
+            )
+        return matches
+
+    def _required(self, part_length, gram_count, word_length):
+        """Trigrams a part and a word must share to reach the threshold"""
+        longest = max(part_length, word_length)
+        if abs(part_length - word_length) > longest // 3:
+            return float("inf")  # rejected by _similarity anyway
+        max_edits = int((1 - self.threshold) * longest + 1e-9)
+        return gram_count - 3 * max_edits
+
+    def _score(self, i, text_norm, words):
+        """Return (score, exact match, positions of the matched words)"""
+        parts = self.parts[i]
+        if not parts:
+            return 0.0, False, set()
+
+        # Exact name (previous behaviour) always matches
+        exact = bool(self.normalized[i]) and self.normalized[i] in text_norm
+
+        total = 0.0
+        full_match = False
+        positions = set()
+        for part in parts:
+            best, best_pos = 0.0, None
+            for pos, (word, _, initial) in enumerate(words):
+                if initial:
+                    sim = INITIAL_SCORE if part[0] == word else 0.0
+                else:
+                    sim = _similarity(part, word)
+                if sim > best:
+                    best, best_pos = sim, pos
+            if best >= self.threshold:
+                positions.add(best_pos)
+                if best > INITIAL_SCORE:
+                    full_match = True
+            elif not exact:
+                # Every part of the name must be found
+                return 0.0, False, set()
+            total += best
+
+        if exact:
+            return 1.0, True, positions
+
+        # Initials alone are not enough
+        if not full_match:
+            return 0.0, False, set()
+        return total / len(parts), False, positions
@@ -0,0 +1,271 @@
+# server.py - local HTTP analysis service with shared result cache
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import urllib.request
+import zipfile
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from urllib.parse import parse_qs, quote, urlparse
+from xml.etree.ElementTree import ParseError
+
+from analysis import analyze_excel
+from stats import compute_statistics
+
+DEFAULT_PORT = 8765
+MAX_BODY = 200 * 1024 * 1024
+SUPPORTED_EXTENSIONS = (".xlsx", ".xlsm", ".csv", ".parquet")
+
+HTTP_STATUS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    413: "Payload Too Large",
+    500: "Internal Server Error",
+}
+
+
+class BadRequest(Exception):
+    """Client error, answered with a 400"""
+
+
+def _analyze_bytes(data, ext, mode):
+    """Run analyze_excel on uploaded content (readers need a file path)"""
+    fd, tmp_path = tempfile.mkstemp(suffix=ext)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        activities, records = analyze_excel(tmp_path, mode)
+    finally:
+        os.remove(tmp_path)
+    return activities, compute_statistics(records)
+
+
+def _read_file(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+class AnalysisService:
+    """
+    Analysis results cached by (content hash, mode, day).
+
+    The day is part of the key because analyze_excel stops at today's date.
+    Concurrent requests for the same key share one computation.
+    Files can only be analyzed by path when they are under root.
+    """
+
+    def __init__(self, max_entries=32, workers=2, root=None):
+        self.max_entries = max_entries
+        self.root = os.path.realpath(root) if root else None
+        self.cache = OrderedDict()  # key -> encoded JSON response
+        self.pending = {}  # key -> running task
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+
+    async def analyze(self, data, ext, mode):
+        digest = hashlib.sha256(data).hexdigest()
+        key = (digest, mode, date.today().isoformat())
+
+        if key in self.cache:
+            self.cache.move_to_end(key)
+            return self.cache[key]
+
+        task = self.pending.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._compute(key, data, ext, mode))
+            self.pending[key] = task
+            task.add_done_callback(lambda _: self.pending.pop(key, None))
+
+        # shield: a client disconnecting must not cancel the shared computation
+        return await asyncio.shield(task)
+
+    async def _compute(self, key, data, ext, mode):
+        loop = asyncio.get_running_loop()
+        try:
+            activities, statistics = await loop.run_in_executor(
+                self.executor, _analyze_bytes, data, ext, mode
+            )
+        except (ValueError, KeyError, zipfile.BadZipFile, ParseError) as e:
+            # Unreadable upload (not a workbook, broken csv, ...)
+            raise BadRequest(f"Fichier illisible : {str(e)}")
+        body = json.dumps(
+            {
+                "sha256": key[0],
+                "mode": mode,
+                "activities": activities,
+                "statistics": statistics,
+            },
+            ensure_ascii=False,
+        ).encode("utf-8")
+
+        self.cache[key] = body
+        while len(self.cache) > self.max_entries:
+            self.cache.popitem(last=False)
+        return body
+
+    # --------------------------------------------------------
+    #   HTTP
+    # --------------------------------------------------------
+    async def handle(self, reader, writer):
+        try:
+            status, body = await self._dispatch(reader)
+        except BadRequest as e:
+            status, body = 400, _error(str(e))
+        except Exception as e:
+            status, body = 500, _error(str(e))
+
+        headers = (
+            f"HTTP/1.1 {status} {HTTP_STATUS[status]}\r\n"
+            "Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            "Connection: close\r\n\r\n"
+        )
+        try:
+            writer.write(headers.encode("ascii") + body)
+            await writer.drain()
+        finally:
+            writer.close()
+
+    async def _dispatch(self, reader):
+        request_line = (await reader.readline()).decode("latin-1").strip()
+        if not request_line:
+            return 400, _error("Requête vide")
+        try:
+            method, target = request_line.split(" ")[:2]
+        except ValueError:
+            return 400, _error("Requête invalide")
+
+        headers = {}
+        while True:
+            line = (await reader.readline()).decode("latin-1").strip()
+            if not line:
+                break
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        url = urlparse(target)
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+
+        if method == "GET" and url.path == "/health":
+            return 200, json.dumps({"status": "ok"}).encode("utf-8")
+        if method != "POST" or url.path != "/analyze":
+            return 404, _error("Route inconnue")
+
+        try:
+            length = int(headers.get("content-length", 0))
+        except ValueError:
+            return 400, _error("Content-Length invalide")
+        if length < 0:
+            return 400, _error("Content-Length invalide")
+        if length > MAX_BODY:
+            return 413, _error("Fichier trop volumineux")
+        try:
+            payload = await reader.readexactly(length)
+        except asyncio.IncompleteReadError:
+            return 400, _error("Requête incomplète")
+
+        if headers.get("content-type", "").startswith("application/json"):
+            # {"path": "...", "mode": "hard"}: file under the --root folder
+            if self.root is None:
+                return 400, _error("Analyse par chemin désactivée (pas de --root)")
+            try:
+                request = json.loads(payload.decode("utf-8"))
+                path = str(request.get("path", ""))
+                mode = request.get("mode", "hard")
+            except (ValueError, AttributeError):
+                return 400, _error("JSON invalide")
+
+            ext = os.path.splitext(path)[1].lower()
+            if ext not in SUPPORTED_EXTENSIONS:
+                return 400, _error(f"Format de fichier non supporté : {ext}")
+
+            real_path = os.path.realpath(os.path.join(self.root, path))
+            try:
+                inside = os.path.commonpath([self.root, real_path]) == self.root
+            except ValueError:  # other drive on Windows
+                inside = False
+            if not inside:
+                return 400, _error(f"Chemin hors du dossier autorisé : {path}")
+            if not os.path.isfile(real_path):
+                return 400, _error(f"Fichier introuvable : {path}")
+            loop = asyncio.get_running_loop()
+            data = await loop.run_in_executor(self.executor, _read_file, real_path)
+        else:
+            # Raw upload: /analyze?mode=hard&filename=export.xlsx
+            data = payload
+            mode = query.get("mode", "hard")
+            ext = os.path.splitext(query.get("filename", ".xlsx"))[1].lower()
+            if ext not in SUPPORTED_EXTENSIONS:
+                return 400, _error(f"Format de fichier non supporté : {ext}")
+
+        if mode not in ("soft", "hard"):
+            return 400, _error(f"Mode inconnu : {mode}")
+
+        return 200, await self.analyze(data, ext, mode)
+
+
+def _error(message):
+    return json.dumps({"error": message}, ensure_ascii=False).encode("utf-8")
+
+
+# --------------------------------------------------------
+#   CLIENT (used by the GUI)
+# --------------------------------------------------------
+def analyze_remote(server_url, path, mode="hard", timeout=300):
+    """
+    Upload a workbook to a running service.
+
+    Returns:
+        tuple: (activities, statistics)
+
+    Raises:
+        OSError: server unreachable or error response
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+
+    filename = quote(os.path.basename(path))
+    url = f"{server_url.rstrip('/')}/analyze?mode={mode}&filename={filename}"
+    request = urllib.request.Request(
+        url,
+        data=data,
+        method="POST",
+        headers={"Content-Type": "application/octet-stream"},
+    )
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        result = json.loads(response.read().decode("utf-8"))
+    return result["activities"], result["statistics"]
+
+
+async def serve(host, port, root=None):
+    service = AnalysisService(root=root)
+    server = await asyncio.start_server(service.handle, host, port)
+    print(f"Service d'analyse PEPS sur http://{host}:{port}")
+    async with server:
+        await server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Service local d'analyse PEPS")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument(
+        "--root",
+        help="Dossier des exports analysables par chemin (désactivé si absent)",
+    )
+    args = parser.parse_args(argv)
+
+    try:
+        asyncio.run(serve(args.host, args.port, args.root))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,113 @@
+# stats.py - compliance statistics over the analysis records
+import pandas as pd
+
+NO_EDUCATOR = "Aucun éducateur"
+
+
+def compute_statistics(records, top_residents=10):
+    """
+    Aggregate the records returned by analyze_excel.
+
+    Compliance is the share of non-cancelled activities without errors, the
+    rate of an error type is the share of non-cancelled activities with it.
+    Everything is computed with grouped pandas aggregations and returned as
+    plain lists, so the result can be cached or sent as JSON.
+    """
+    empty = {
+        "total": 0,
+        "incomplete": 0,
+        "cancelled": 0,
+        "compliance": None,
+        "per_educator": [],
+        "per_week": [],
+        "per_error": [],
+        "missing_residents": [],
+    }
+    if not records:
+        return empty
+
+    df = pd.DataFrame.from_records(
+        records, columns=["date", "educators", "status", "tag", "missing_notes"]
+    )
+    counts = df["status"].value_counts()
+    totals = {
+        "total": len(df),
+        "incomplete": int(counts.get("incomplete", 0)),
+        "cancelled": int(counts.get("cancelled", 0)),
+    }
+
+    evaluated = df[df["status"] != "cancelled"].copy()
+    if evaluated.empty:
+        return {**empty, **totals}
+    evaluated["compliant"] = evaluated["status"] == "ok"
+
+    # Per educator: one row per (activity, educator)
+    by_educator = evaluated[["educators", "compliant"]].explode("educators")
+    by_educator["educators"] = by_educator["educators"].fillna(NO_EDUCATOR)
+    per_educator = (
+        by_educator.groupby("educators")["compliant"]
+        .agg(["mean", "size"])
+        .sort_values(["mean", "size"], ascending=[True, False])
+    )
+
+    # Per ISO week
+    iso = pd.to_datetime(evaluated["date"]).dt.isocalendar()
+    week = iso["year"].astype(str) + "-S" + iso["week"].astype(str).str.zfill(2)
+    per_week = evaluated.groupby(week)["compliant"].agg(["mean", "size"]).sort_index()
+
+    # Per error type
+    per_error = (
+        evaluated.loc[~evaluated["compliant"], "tag"].value_counts().sort_index()
+    )
+
+    # Residents who most often participated without an individual note
+    missing = evaluated["missing_notes"].explode().dropna().value_counts()
+
+    return {
+        **totals,
+        "compliance": float(evaluated["compliant"].mean()),
+        "per_educator": [
+            {"name": name, "rate": float(row["mean"]), "count": int(row["size"])}
+            for name, row in per_educator.iterrows()
+        ],
+        "per_week": [
+            {"week": w, "rate": float(row["mean"]), "count": int(row["size"])}
+            for w, row in per_week.iterrows()
+        ],
+        "per_error": [
+            {"tag": tag, "rate": float(count / len(evaluated)), "count": int(count)}
+            for tag, count in per_error.items()
+        ],
+        "missing_residents": [
+            {"name": name, "count": int(count)}
+            for name, count in missing.head(top_residents).items()
+        ],
+    }
+
+
+def format_statistics(stats):
+    """Text shown in the statistics window"""
+    if stats["compliance"] is None:
+        return "Aucune activité analysée."
+
+    txt = f"Conformité globale : {stats['compliance']:.0%}"
+    txt += f" ({stats['total']} activités)\n\n"
+
+    txt += "Par éducateur :\n"
+    for e in stats["per_educator"]:
+        txt += f"  {e['name']:<30} {e['rate']:>5.0%}  ({e['count']})\n"
+
+    txt += "\nPar semaine :\n"
+    for w in stats["per_week"]:
+        txt += f"  {w['week']:<30} {w['rate']:>5.0%}  ({w['count']})\n"
+
+    txt += "\nPar type d'erreur :\n"
+    for e in stats["per_error"]:
+        txt += f"  {e['tag']:<30} {e['rate']:>5.0%}  ({e['count']})\n"
+
+    if stats["missing_residents"]:
+        txt += "\nRésidents le plus souvent sans note :\n"
+        for r in stats["missing_residents"]:
+            txt += f"  {r['name']:<30} {r['count']:>5}\n"
+
+    return txt
@@ -0,0 +1,206 @@
+# xlsx_reader.py - fast PEPS xlsx reader (first sheet, columns A-D only)
+import posixpath
+import re
+import zipfile
+from datetime import datetime, timedelta
+from xml.etree.ElementTree import iterparse, parse
+
+import pandas as pd
+
+NS = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+REL_NS = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+PKG_REL_NS = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+
+# Excel escapes some control characters as _xHHHH_ (ex: _x000D_ for \r)
+ESCAPED_CHAR = re.compile(r"_x([0-9A-Fa-f]{4})_")
+
+
+def _unescape(text):
+    if not text or "_x" not in text:
+        return text
+    return ESCAPED_CHAR.sub(lambda m: chr(int(m.group(1), 16)), text)
+
+
+def _column_index(ref):
+    """'C12' -> 2"""
+    col = 0
+    for ch in ref:
+        if not ch.isalpha():
+            break
+        col = col * 26 + (ord(ch.upper()) - 64)
+    return col - 1
+
+
+def _first_sheet(zf):
+    """Return (path of the first worksheet, workbook uses 1904 dates)"""
+    with zf.open("xl/workbook.xml") as f:
+        workbook = parse(f).getroot()
+
+    props = workbook.find(f"{NS}workbookPr")
+    date1904 = props is not None and props.get("date1904") in ("1", "true")
+
+    sheet = workbook.find(f"{NS}sheets/{NS}sheet")
+    rel_id = sheet.get(f"{REL_NS}id")
+
+    with zf.open("xl/_rels/workbook.xml.rels") as f:
+        rels = parse(f).getroot()
+    for rel in rels.iter(f"{PKG_REL_NS}Relationship"):
+        if rel.get("Id") == rel_id:
+            target = rel.get("Target")
+            if target.startswith("/"):
+                return target.lstrip("/"), date1904
+            return posixpath.normpath(posixpath.join("xl", target)), date1904
+
+    raise ValueError("Feuille introuvable dans le classeur")
+
+
+def _text_of(elem):
+    """Concatenate <t> texts of a string item, ignoring phonetic runs"""
+    parts = []
+    for child in elem:
+        if child.tag == f"{NS}t":
+            parts.append(child.text or "")
+        elif child.tag == f"{NS}r":
+            t = child.find(f"{NS}t")
+            if t is not None:
+                parts.append(t.text or "")
+    return _unescape("".join(parts))
+
+
+def _read_shared_strings(zf, needed):
+    """Resolve only the shared string indexes used by the kept cells"""
+    strings = {}
+    if not needed or "xl/sharedStrings.xml" not in zf.namelist():
+        return strings
+
+    last = max(needed)
+    index = 0
+    with zf.open("xl/sharedStrings.xml") as f:
+        for _, elem in iterparse(f, events=("end",)):
+            if elem.tag != f"{NS}si":
+                continue
+            if index in needed:
+                strings[index] = _text_of(elem)
+            elem.clear()
+            index += 1
+            if index > last:
+                break
+    return strings
+
+
+def _from_serial(number, epoch):
+    """Excel serial date -> datetime, rounded to the millisecond like openpyxl"""
+    day, fraction = divmod(number, 1)
+    # 1900 date system: Excel counts a 29/02/1900 that never existed
+    if 0 < number < 60 and epoch.year == 1899:
+        day += 1
+    return epoch + timedelta(days=day, milliseconds=round(fraction * 86400000))
+
+
+def _cell_value(cell_type, text, col, epoch):
+    """Value of a non shared-string cell, from its type and <v> text"""
+    if text is None:
+        return None
+    if cell_type == "b":
+        return text == "1"
+    if cell_type in ("str", "e"):
+        return _unescape(text)
+    if cell_type == "d":
+        # ISO 8601 date cell
+        try:
+            return datetime.fromisoformat(text)
+        except ValueError:
+            return text
+    if cell_type not in (None, "n"):
+        # Unknown type: keep the raw text
+        return text
+
+    try:
+        number = float(text)
+    except ValueError:
+        return text
+    if col == 0:
+        return _from_serial(number, epoch)
+    if number.is_integer():
+        return int(number)
+    return number
+
+
+def read_peps_xlsx(path, max_columns=4):
+    """
+    Read the first sheet of a PEPS export, keeping only the first columns.
+
+    max_columns=None keeps every column. The sheet XML is streamed and rows
+    are dropped from the tree as soon as they are read. Styles are never
+    loaded: numeric cells in column A are taken as Excel dates, like the
+    date column of a PEPS export.
+
+    Returns:
+        DataFrame: same positional layout as pd.read_excel(path, header=None)
+    """
+    with zipfile.ZipFile(path) as zf:
+        sheet_path, date1904 = _first_sheet(zf)
+        epoch = datetime(1904, 1, 1) if date1904 else datetime(1899, 12, 30)
+
+        columns = [[] for _ in range(max_columns or 0)]
+        shared_cells = []  # (column, row, shared string index)
+        n_rows = 0
+        with zf.open(sheet_path) as f:
+            sheet_data = None
+            row = {}
+            col = 0
+            for event, elem in iterparse(f, events=("start", "end")):
+                tag = elem.tag
+                if event == "start":
+                    if tag == f"{NS}sheetData":
+                        sheet_data = elem
+                    elif tag == f"{NS}row":
+                        row = {}
+                        col = 0
+                    continue
+
+                if tag == f"{NS}c":
+                    ref = elem.get("r")
+                    if ref:
+                        col = _column_index(ref)
+                    if max_columns is None or col < max_columns:
+                        cell_type = elem.get("t")
+                        v = elem.find(f"{NS}v")
+                        text = v.text if v is not None else None
+
+                        if cell_type == "s":
+                            if text is not None:
+                                shared_cells.append((col, n_rows, int(text)))
+                                row[col] = None
+                        elif cell_type == "inlineStr":
+                            inline = elem.find(f"{NS}is")
+                            if inline is not None:
+                                row[col] = _text_of(inline)
+                        else:
+                            row[col] = _cell_value(cell_type, text, col, epoch)
+                    col += 1
+                    elem.clear()
+
+                elif tag == f"{NS}row":
+                    # Columns seen for the first time start empty
+                    width = max(row, default=-1) + 1
+                    while len(columns) < width:
+                        columns.append([None] * n_rows)
+                    for c, values in enumerate(columns):
+                        values.append(row.get(c))
+                    n_rows += 1
+                    if sheet_data is not None:
+                        sheet_data.clear()
+
+        strings = _read_shared_strings(zf, {idx for _, _, idx in shared_cells})
+
+    for c, r, idx in shared_cells:
+        columns[c][r] = strings.get(idx)
+
+    # Drop trailing empty columns, like pd.read_excel does
+    while columns and all(v is None for v in columns[-1]):
+        columns.pop()
+    df = pd.DataFrame(dict(enumerate(columns)), columns=range(len(columns)))
+
+    # Drop empty rows
+    return df.dropna(how="all").reset_index(drop=True)